@@ -1,17 +1,47 @@
 import argparse
 import curses
+import glob
+import os
+import re
+import time
 
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from itertools import chain
 from typing import List
+from typing import Optional
+from typing import Tuple
+
+Opcode = Tuple[str, int, int, int, int]
+FileEntry = Tuple[str, str, int, float]  # path, name, size, mtime
+
+# Most diagonals per line the compare view searches before it stops
+# looking for matches, counting small files as DIFF_WORK_MIN_LINES long.
+# Each region gets at least DIFF_MIN_ROUNDS rounds and sqrt(size) /
+# DIFF_ROUNDS_DIVISOR when it is bigger, like the too expensive limit in
+# GNU diff.
+DIFF_MAX_WORK = 2
+DIFF_WORK_MIN_LINES = 500_000
+DIFF_MIN_ROUNDS = 32
+DIFF_ROUNDS_DIVISOR = 32
 
 
 def setup_header(filename: str,
                  file_number: int,
                  total_files: int,
-                 width: int) -> str:
+                 width: int,
+                 missing_files: Optional[List[str]] = None,
+                 unreadable_files: Optional[List[str]] = None) -> str:
     if total_files == 1:
         header_str = filename
     else:
         header_str = f"{filename}  {file_number + 1} / {total_files}"
+    if missing_files:
+        header_str += f"  (not found: {', '.join(missing_files)})"
+    if unreadable_files:
+        header_str += f"  (can not read: {', '.join(unreadable_files)})"
+    header_str = header_str[:width]
     padding = width - len(header_str)
     left_padding = int(padding / 2)
     right_padding = padding - left_padding
@@ -58,21 +88,610 @@ def load_file(filename: str) -> str:
         return data
 
 
+def validate_files(filenames: List[str],
+                   found: List[str],
+                   missing: List[str]) -> None:
+    # splits filenames into the ones that can be opened and the ones that
+    # can not. Runs on a worker thread so the first file is drawn first.
+    for file in filenames:
+        if os.path.isfile(file) and os.access(file, os.R_OK):
+            found.append(file)
+        else:
+            missing.append(file)
+
+
+def start_validate_files(filenames: List[str],
+                         found: List[str],
+                         missing: List[str]):
+    import threading  # only needed when more than one file is passed
+
+    thread = threading.Thread(target=validate_files,
+                              args=(filenames, found, missing),
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def is_pattern(filename: str) -> bool:
+    return any(c in filename for c in "*?[") and not os.path.exists(filename)
+
+
+def pattern_root(pattern: str) -> str:
+    # the leading directories of pattern that have no wildcards
+    root = []
+    for part in pattern.split(os.sep)[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        root.append(part)
+    return os.sep.join(root)
+
+
+def scan_directory(directory: str,
+                   recursive: bool,
+                   entries: List[FileEntry],
+                   prefix: str = "") -> None:
+    # names in entries are relative to directory, starting with prefix
+    directories = [(directory, prefix)]
+    while directories:
+        sub_directories = []
+        path, name_prefix = directories.pop()
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            sub_directories.append(
+                                (entry.path, f"{name_prefix}{entry.name}/"))
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            entries.append((entry.path,
+                                            name_prefix + entry.name,
+                                            stat.st_size,
+                                            stat.st_mtime))
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if recursive:
+            # reversed so sub directories are scanned in listed order
+            directories.extend(reversed(sub_directories))
+
+
+def scan_files(sources: List[str],
+               recursive: bool,
+               entries: List[FileEntry],
+               missing: Optional[List[str]] = None) -> None:
+    # fills entries with the files in the directories and glob patterns
+    # in sources. Patterns that match nothing, such as a missing file
+    # named report[1].txt, are added to missing. Runs on a worker thread
+    # so the file list can be used while it is still growing.
+    for source in sources:
+        # a recursive ** pattern already matches every file below the
+        # directories it matches, so those directories are not scanned
+        globbed = recursive and "**" in source
+        if is_pattern(source):
+            paths = glob.iglob(source, recursive=recursive)
+            root = pattern_root(source)
+        else:
+            paths = iter([source])
+            root = source
+        root = os.path.normpath(root) if root else root
+        matched = False
+        for path in paths:
+            matched = True
+            name = os.path.relpath(path, root) if root else path
+            if os.path.isdir(path):
+                if globbed:
+                    continue
+                prefix = "" if os.path.normpath(path) == root else f"{name}/"
+                scan_directory(path, recursive, entries, prefix)
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, name, stat.st_size, stat.st_mtime))
+        if not matched and missing is not None:
+            missing.append(source)
+
+
+def start_scan_files(sources: List[str],
+                     recursive: bool,
+                     entries: List[FileEntry],
+                     missing: List[str]):
+    import threading  # only needed when directories or patterns are passed
+
+    thread = threading.Thread(target=scan_files,
+                              args=(sources, recursive, entries, missing),
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def fuzzy_pattern(query: str):
+    # matches names that have the letters of query in order
+    return re.compile(".*?".join(re.escape(c) for c in query), re.IGNORECASE)
+
+
+def filter_entries(entries: List[FileEntry],
+                   indexes,
+                   pattern) -> array:
+    search = pattern.search
+    return array("q", (i for i in indexes if search(entries[i][1])))
+
+
+def setup_file_entry(entry: FileEntry, width: int) -> str:
+    _, name, size, mtime = entry
+    modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime))
+    line = f"{size: >12}  {modified}  {name}"
+    if len(line) > width:
+        return line[:width - 1] + "$"
+    return f"{line: <{width}}"
+
+
+def file_picker(screen,
+                entries: List[FileEntry],
+                scanner=None,
+                missing_files: Optional[List[str]] = None) -> Optional[str]:
+    # returns the path of the chosen file or None if escape was pressed
+    query = ""
+    pattern = fuzzy_pattern(query)
+    matches = array("q")
+    filtered = 0  # entries checked against pattern so far
+    selected = 0
+    top = 0
+    while True:
+        scanning = scanner is not None and scanner.is_alive()
+        # keep redrawing while the list is filling up
+        screen.timeout(100 if scanning else -1)
+        total = len(entries)
+        matches.extend(filter_entries(entries, range(filtered, total),
+                                      pattern))
+        filtered = total
+
+        screen_height, screen_width = screen.getmaxyx()
+        rows = max(screen_height - 3, 1)
+        if selected < top:
+            top = selected
+        elif selected >= top + rows:
+            top = selected - rows + 1
+        header_str = f"{len(matches)} / {total} files"
+        if scanning:
+            header_str += "  (scanning)"
+        header = setup_header(header_str, 0, 1, screen_width, missing_files)
+
+        screen.clear()
+        screen.addstr(0, 0, header, curses.color_pair(1))
+        for i, index in enumerate(matches[top:top + rows], start=1):
+            if top + i - 1 == selected:
+                color = curses.color_pair(2)
+            else:
+                color = curses.color_pair(0)
+            screen.addstr(i, 0, setup_file_entry(entries[index],
+                                                 screen_width), color)
+        prompt = f"Filter: {query}"[:screen_width - 1]
+        screen.addstr(screen_height - 1, 0, prompt)
+
+        screen.refresh()
+        ch = screen.getch()
+        if ch == -1:  # timed out, pick up newly scanned files
+            continue
+        elif ch == curses.KEY_ENTER or ch == 10:
+            if matches:
+                screen.timeout(-1)
+                return entries[matches[selected]][0]
+        elif ch == 27:  # escape
+            screen.timeout(-1)
+            return None
+        elif ch == curses.KEY_DOWN:
+            if selected < len(matches) - 1:
+                selected += 1
+        elif ch == curses.KEY_UP:
+            if selected > 0:
+                selected -= 1
+        elif ch == curses.KEY_NPAGE:
+            selected = max(min(selected + rows, len(matches) - 1), 0)
+        elif ch == curses.KEY_PPAGE:
+            selected = max(selected - rows, 0)
+        elif ch in [curses.KEY_BACKSPACE, 127, 8]:
+            if query:
+                query = query[:-1]
+                pattern = fuzzy_pattern(query)
+                matches = array("q")
+                filtered = 0
+                selected = 0
+        elif 32 <= ch <= 126:
+            # a longer query only needs to look at the current matches
+            query += chr(ch)
+            pattern = fuzzy_pattern(query)
+            matches = filter_entries(entries, matches, pattern)
+            selected = 0
+
+
+def get_file_data(file_data: List[Optional[str]],
+                  filename: List[str],
+                  current_file: int,
+                  unreadable_files: Optional[List[str]] = None) -> str:
+    # files after the first are only read the first time they are viewed.
+    # Files that can not be read as text are shown as empty and added to
+    # unreadable_files.
+    if file_data[current_file] is None:
+        try:
+            file_data[current_file] = load_file(filename[current_file])
+        except (OSError, UnicodeDecodeError):
+            file_data[current_file] = ""
+            if unreadable_files is not None:
+                unreadable_files.append(filename[current_file])
+    return file_data[current_file]
+
+
+def get_line_data(file_data: List[Optional[str]],
+                  filename: List[str],
+                  current_file: int,
+                  unreadable_files: Optional[List[str]] = None) -> List[str]:
+    return get_file_data(file_data, filename, current_file,
+                         unreadable_files).splitlines()
+
+
+def hash_lines(data: str, chunk_size: int = 1 << 20) -> Tuple[array, array]:
+    # returns a hash for every line and the offset each line starts at.
+    # The last offset is the end of the data so line i is
+    # data[starts[i]:starts[i + 1]]. Works through the data a chunk at a
+    # time so only one chunk of lines is held as strings.
+    hashes = array("q")
+    starts = array("q")
+    pos = 0
+    end = len(data)
+    while pos < end:
+        chunk_end = data.find("\n", pos + chunk_size)
+        chunk_end = end if chunk_end == -1 else chunk_end + 1
+        lines = data[pos:chunk_end].split("\n")
+        if lines[-1] == "":
+            lines.pop()  # chunk ends with a newline
+        hashes.extend(map(hash, lines))
+        starts.extend(accumulate(chain([pos], map(len, lines[:-1])),
+                                 lambda start, length: start + length + 1))
+        pos = chunk_end
+    starts.append(end)
+    return hashes, starts
+
+
+def get_line(data: str, starts: array, line: int) -> str:
+    return data[starts[line]:starts[line + 1]].rstrip("\n")
+
+
+def match_forward(a: array, i: int, a_end: int,
+                  b: array, j: int, b_end: int) -> int:
+    # number of equal hashes from a[i] and b[j] on. Compares growing
+    # chunks so long runs of equal lines are checked in C, not per line.
+    limit = min(a_end - i, b_end - j)
+    matched = 0
+    chunk = 1
+    while matched < limit:
+        size = min(chunk, limit - matched)
+        if (a[i + matched:i + matched + size] ==
+                b[j + matched:j + matched + size]):
+            matched += size
+            chunk *= 2
+        elif size == 1:
+            break
+        else:
+            chunk = 1
+    return matched
+
+
+def match_backward(a: array, i: int, a_start: int,
+                   b: array, j: int, b_start: int) -> int:
+    # number of equal hashes going back from a[i - 1] and b[j - 1]
+    limit = min(i - a_start, j - b_start)
+    matched = 0
+    chunk = 1
+    while matched < limit:
+        size = min(chunk, limit - matched)
+        if (a[i - matched - size:i - matched] ==
+                b[j - matched - size:j - matched]):
+            matched += size
+            chunk *= 2
+        elif size == 1:
+            break
+        else:
+            chunk = 1
+    return matched
+
+
+def middle_snake(a: array, a_start: int, n: int,
+                 b: array, b_start: int, m: int,
+                 max_d: int) -> Optional[Tuple[int, int, int, int, int]]:
+    # Myers' linear space search. Returns the snake (x, y) -> (u, v) in the
+    # middle of a shortest edit path, relative to a_start and b_start, and
+    # the number of rounds d it took. If that needs more than max_d rounds
+    # it gives up like GNU diff does and returns an empty snake at the
+    # furthest point any forward or backward path reached.
+    delta = n - m
+    odd = delta % 2 == 1
+    max_d = min(max_d, (n + m + 1) // 2)
+    # furthest x reached on each diagonal k, only as big as d gets
+    forward = {1: 0}
+    backward = {1: 0}
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            snake = match_forward(a, a_start + x, a_start + n,
+                                  b, b_start + y, b_start + m)
+            x += snake
+            y += snake
+            forward[k] = x
+            reverse_k = delta - k
+            if (odd and -(d - 1) <= reverse_k <= d - 1 and
+                    x + backward[reverse_k] >= n):
+                return start_x, start_y, x, y, d
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           backward[k - 1] < backward[k + 1]):
+                x = backward[k + 1]
+            else:
+                x = backward[k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            snake = match_backward(a, a_start + n - x, a_start,
+                                   b, b_start + m - y, b_start)
+            x += snake
+            y += snake
+            backward[k] = x
+            forward_k = delta - k
+            if (not odd and -d <= forward_k <= d and
+                    x + forward[forward_k] >= n):
+                return n - x, m - y, n - start_x, m - start_y, d
+    # ties go to the diagonal nearest the middle, which deletes as many
+    # lines as it inserts, so a replaced block is split on both sides
+    best_x, best_y, best = 0, 0, (0, 0)
+    for k in range(-max_d, max_d + 1, 2):
+        x = forward[k]
+        y = x - k
+        if 0 <= x <= n and 0 <= y <= m and (x + y, -abs(k)) > best:
+            best_x, best_y, best = x, y, (x + y, -abs(k))
+    for k in range(-max_d, max_d + 1, 2):
+        x = backward[k]
+        y = x - k
+        if 0 <= x <= n and 0 <= y <= m and (x + y, -abs(k)) > best:
+            best_x, best_y, best = n - x, m - y, (x + y, -abs(k))
+    if (best_x, best_y) in [(0, 0), (n, m)]:
+        return None  # can not happen after a full round without a match
+    return best_x, best_y, best_x, best_y, max_d
+
+
+def diff_hashes(a: array,
+                b: array,
+                max_work: int = DIFF_MAX_WORK) -> List[Opcode]:
+    # returns opcodes like difflib.SequenceMatcher.get_opcodes(). Each
+    # region gets rounds by its size before middle_snake splits it at the
+    # furthest point reached, so the diff stays close to the shortest one.
+    # Only when max_work diagonals per line have been searched, as for two
+    # files with nothing in common, are the regions left reported as
+    # replaced without being searched.
+    max_work *= max(len(a) + len(b), DIFF_WORK_MIN_LINES)
+    matches = []
+    todo = [("diff", 0, len(a), 0, len(b))]
+    while todo:
+        task, a_lo, a_hi, b_lo, b_hi = todo.pop()
+        if task == "match":  # (a_lo, b_lo) and the length in a_hi
+            matches.append((a_lo, b_lo, a_hi))
+            continue
+        prefix = match_forward(a, a_lo, a_hi, b, b_lo, b_hi)
+        if prefix:
+            matches.append((a_lo, b_lo, prefix))
+            a_lo += prefix
+            b_lo += prefix
+        suffix = match_backward(a, a_hi, a_lo, b, b_hi, b_lo)
+        a_hi -= suffix
+        b_hi -= suffix
+        if suffix:
+            todo.append(("match", a_hi, suffix, b_hi, 0))
+        if a_lo == a_hi or b_lo == b_hi or max_work <= 0:
+            continue
+        size = a_hi - a_lo + b_hi - b_lo
+        max_d = max(DIFF_MIN_ROUNDS, int(size ** 0.5) // DIFF_ROUNDS_DIVISOR)
+        snake = middle_snake(a, a_lo, a_hi - a_lo, b, b_lo, b_hi - b_lo,
+                             max_d)
+        if snake is None:
+            continue
+        x, y, u, v, d = snake
+        max_work -= (d + 1) ** 2  # diagonals searched forward and back
+        # pushed in reverse so the left side comes off the stack first
+        todo.append(("diff", a_lo + u, a_hi, b_lo + v, b_hi))
+        if u > x:
+            todo.append(("match", a_lo + x, u - x, b_lo + y, 0))
+        todo.append(("diff", a_lo, a_lo + x, b_lo, b_lo + y))
+
+    opcodes = []
+    i = j = 0
+    for a_match, b_match, size in matches + [(len(a), len(b), 0)]:
+        if i < a_match and j < b_match:
+            opcodes.append(("replace", i, a_match, j, b_match))
+        elif i < a_match:
+            opcodes.append(("delete", i, a_match, j, j))
+        elif j < b_match:
+            opcodes.append(("insert", i, i, j, b_match))
+        if size:
+            i, j = a_match + size, b_match + size
+            if opcodes and opcodes[-1][0] == "equal":
+                tag, a_lo, _, b_lo, _ = opcodes.pop()
+                opcodes.append(("equal", a_lo, i, b_lo, j))
+            else:
+                opcodes.append(("equal", a_match, i, b_match, j))
+    return opcodes
+
+
+def compare_row_starts(opcodes: List[Opcode]) -> array:
+    # the first screen row of each opcode, plus the total number of rows
+    row_starts = array("q", [0])
+    for _, a_lo, a_hi, b_lo, b_hi in opcodes:
+        row_starts.append(row_starts[-1] + max(a_hi - a_lo, b_hi - b_lo))
+    return row_starts
+
+
+def compare_row(opcodes: List[Opcode],
+                row_starts: array,
+                row: int) -> Tuple[str, Optional[int], Optional[int]]:
+    # returns the tag and the line in each file shown on a screen row
+    index = bisect_right(row_starts, row) - 1
+    tag, a_lo, a_hi, b_lo, b_hi = opcodes[index]
+    offset = row - row_starts[index]
+    a_line = a_lo + offset if offset < a_hi - a_lo else None
+    b_line = b_lo + offset if offset < b_hi - b_lo else None
+    return tag, a_line, b_line
+
+
 def setup_curses_colors() -> None:
     curses.init_pair(1, curses.COLOR_BLACK, curses.COLOR_GREEN)
     curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_WHITE)
+    # compare view
+    curses.init_pair(3, curses.COLOR_BLACK, curses.COLOR_YELLOW)  # changed
+    curses.init_pair(4, curses.COLOR_BLACK, curses.COLOR_RED)  # removed
+    curses.init_pair(5, curses.COLOR_BLACK, curses.COLOR_CYAN)  # added
+
+
+def compare_cell(data: str,
+                 starts: array,
+                 line: Optional[int],
+                 width: int,
+                 column_modifier: int) -> str:
+    # text for one side of a compare row, padded or cut to width
+    if line is None:
+        return " " * width
+    text = get_line(data, starts, line)[column_modifier:]
+    if len(text) > width:
+        return text[:width - 1] + "$"
+    return f"{text: <{width}}"
+
+
+def compare_main(screen,
+                 file_data: List[Optional[str]],
+                 filename: List[str],
+                 first_file: int,
+                 second_file: int,
+                 unreadable_files: Optional[List[str]] = None) -> None:
+    screen_height, screen_width = screen.getmaxyx()
+    header = setup_header(f"comparing {filename[first_file]}  |  "
+                          f"{filename[second_file]}", 0, 1, screen_width)
+    screen.clear()
+    screen.addstr(0, 0, header, curses.color_pair(1))
+    screen.refresh()
+    first_data = get_file_data(file_data, filename, first_file,
+                               unreadable_files)
+    second_data = get_file_data(file_data, filename, second_file,
+                                unreadable_files)
+    first_hashes, first_starts = hash_lines(first_data)
+    second_hashes, second_starts = hash_lines(second_data)
+    opcodes = diff_hashes(first_hashes, second_hashes)
+    del first_hashes, second_hashes
+    row_starts = compare_row_starts(opcodes)
+    total_rows = row_starts[-1]
+    changes = [start for start, opcode in zip(row_starts, opcodes)
+               if opcode[0] != "equal"]
+    colors = {"replace": 3, "delete": 4, "insert": 5}
+
+    line_modifier = 0
+    column_modifier = 0
+    while True:
+        screen_height, screen_width = screen.getmaxyx()
+        left_width = (screen_width - 1) // 2
+        right_width = screen_width - left_width - 1
+        header = setup_header(f"{filename[first_file]}  |  "
+                              f"{filename[second_file]}",
+                              0, 1, screen_width)
+
+        screen.clear()
+        screen.addstr(0, 0, header, curses.color_pair(1))
+        for i in range(1, screen_height - 2):
+            row = line_modifier + i - 1
+            if row >= total_rows:
+                break
+            tag, first_line, second_line = compare_row(opcodes,
+                                                       row_starts,
+                                                       row)
+            color = curses.color_pair(colors.get(tag, 0))
+            screen.addstr(i, 0,
+                          compare_cell(first_data, first_starts, first_line,
+                                       left_width, column_modifier),
+                          color)
+            screen.addstr(i, left_width, "|", curses.color_pair(2))
+            screen.addstr(i, left_width + 1,
+                          compare_cell(second_data, second_starts,
+                                       second_line, right_width,
+                                       column_modifier),
+                          color)
+
+        screen.refresh()
+        ch = screen.getch()
+        if ch in [81, 113]:  # q, Q
+            break
+        elif ch == curses.KEY_DOWN:
+            if line_modifier <= total_rows - screen_height + 2:
+                line_modifier += 1
+        elif ch == curses.KEY_UP:
+            if line_modifier > 0:
+                line_modifier -= 1
+        elif ch == curses.KEY_RIGHT:
+            column_modifier += 1
+        elif ch == curses.KEY_LEFT:
+            if column_modifier > 0:
+                column_modifier -= 1
+        elif ch == curses.KEY_NPAGE:
+            line_modifier += screen_height - 4
+            if line_modifier >= total_rows - screen_height + 2:
+                line_modifier = max(total_rows - screen_height + 3, 0)
+        elif ch == curses.KEY_PPAGE:
+            line_modifier -= screen_height - 4
+            if line_modifier <= 0:
+                line_modifier = 0
+        elif ch == 110:  # n
+            index = bisect_right(changes, line_modifier)
+            if index < len(changes):
+                line_modifier = changes[index]
+        elif ch == 112:  # p
+            index = bisect_right(changes, line_modifier - 1) - 1
+            if index >= 0:
+                line_modifier = changes[index]
 
 
 def curses_main(screen,
-                file_data: List[str],
+                file_data: List[Optional[str]],
                 filename: List[str],
-                line_numbers: bool) -> None:
+                line_numbers: bool,
+                validator=None,
+                found_files: Optional[List[str]] = None,
+                missing_files: Optional[List[str]] = None,
+                scanner=None,
+                file_entries: Optional[List[FileEntry]] = None,
+                unreadable_files: Optional[List[str]] = None) -> None:
+    if found_files is None:
+        found_files = []
+    if missing_files is None:
+        missing_files = []
+    if unreadable_files is None:
+        unreadable_files = []
     setup_curses_colors()
     curses.curs_set(0)  # Set the cursor to off.
     current_file = 0
+    if not file_data:
+        # only directories or patterns were passed, start in the file list
+        picked_file = file_picker(screen, file_entries, scanner,
+                                  missing_files)
+        if picked_file is None:
+            return
+        file_data.append(None)
+        filename.append(picked_file)
     total_files = len(file_data)
-    line_data = file_data[current_file].splitlines(keepends=True)
-    if line_data[-1][-1] == "\n":
+    line_data = get_file_data(file_data, filename, current_file,
+                              unreadable_files).splitlines(keepends=True)
+    if line_data and line_data[-1][-1] == "\n":
         line_data.append("\n")
 
     line_modifier = 0
@@ -88,7 +707,9 @@ def curses_main(screen,
         header = setup_header(filename[current_file],
                               current_file,
                               total_files,
-                              screen_width)
+                              screen_width,
+                              missing_files,
+                              unreadable_files)
         part_data = line_data[line_modifier:line_modifier + screen_height]
 
         screen.clear()
@@ -113,8 +734,21 @@ def curses_main(screen,
                 screen.addstr(i, 0 + line_num_mod, line[column_modifier:])
 
         screen.refresh()
+        if validator is not None and not validator.is_alive():
+            # the rest of the files are checked, add them and redraw
+            validator = None
+            file_data.extend([None] * len(found_files))
+            filename.extend(found_files)
+            total_files = len(file_data)
+            continue
+        if validator is not None:
+            # keep reading keys while the files are checked
+            screen.timeout(100)
         ch = screen.getch()
-        if ch in [81, 113]:  # q, Q
+        screen.timeout(-1)
+        if ch == -1:  # timed out, check on the files again
+            continue
+        elif ch in [81, 113]:  # q, Q
             break
         elif ch == curses.KEY_DOWN:
             if line_modifier <= len(line_data) - screen_height + 2:
@@ -153,15 +787,45 @@ def curses_main(screen,
                 current_file = 0
             else:
                 current_file += 1
-            line_data = file_data[current_file].splitlines()
+            line_data = get_line_data(file_data, filename, current_file,
+                                      unreadable_files)
         elif ch == 2:  # ctrl-b
             if current_file == 0:
                 current_file = total_files - 1
             else:
                 current_file -= 1
-            line_data = file_data[current_file].splitlines()
+            line_data = get_line_data(file_data, filename, current_file,
+                                      unreadable_files)
+        elif ch == 111:  # o
+            if file_entries is not None:
+                picked_file = file_picker(screen, file_entries, scanner,
+                                          missing_files)
+                if picked_file in filename:
+                    current_file = filename.index(picked_file)
+                elif picked_file is not None:
+                    file_data.append(None)
+                    filename.append(picked_file)
+                    total_files += 1
+                    current_file = total_files - 1
+                if picked_file is not None:
+                    line_data = get_line_data(file_data, filename,
+                                              current_file, unreadable_files)
+                    line_modifier = 0
+                    column_modifier = 0
+        elif ch == 99:  # c
+            if total_files > 1:
+                compare_main(screen, file_data, filename, current_file,
+                             (current_file + 1) % total_files,
+                             unreadable_files)
         elif ch == 24:  # ctrl-x
             close_num = current_file
+            if total_files == 1 and validator is not None:
+                # the files still being checked come after this one
+                validator.join()
+                validator = None
+                file_data.extend([None] * len(found_files))
+                filename.extend(found_files)
+                total_files = len(file_data)
             if total_files == 1:
                 break
             total_files -= 1
@@ -169,8 +833,13 @@ def curses_main(screen,
                 current_file = 0
             file_data.pop(close_num)
             filename.pop(close_num)
-            line_data = file_data[current_file].splitlines()
+            line_data = get_line_data(file_data, filename, current_file,
+                                      unreadable_files)
         elif ch == 1:  # ctrl-a
+            if validator is not None:
+                # drop the files still being checked along with the rest
+                validator = None
+                found_files = []
             if total_files > 1:
                 current_file_data = file_data[current_file]
                 current_file_name = filename[current_file]
@@ -184,26 +853,67 @@ def curses_main(screen,
 
 def main() -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument("filename", nargs="+", help="file name(s) to view")
+    parser.add_argument("filename", nargs="+",
+                        help="file name(s), directories or glob patterns "
+                             "to view")
     parser.add_argument("-l", "--linenumbers", action="store_true",
                         help="show line numbers")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="include sub directories in the file list")
     args = parser.parse_args()
 
+    # Directories and patterns go to the file list, which is filled in on
+    # a worker thread.
+    files = []
+    sources = []
+    for file in args.filename:
+        if os.path.isdir(file) or is_pattern(file):
+            sources.append(file)
+        else:
+            files.append(file)
+
+    # Only the first file that can be opened is loaded before the first
+    # screen is drawn. The rest are checked on a worker thread and read
+    # when they are switched to.
+    missing_files = []
+    unreadable_files = []
     file_data = []
     file_names = []
-    for file in args.filename:
+    remaining_files = []
+    for index, file in enumerate(files):
         try:
-            file_data.append(load_file(file))
-            file_names.append(file)
+            first_file_data = load_file(file)
         except FileNotFoundError:
-            pass
-
-    if len(file_data) == 0:
-        print("No files loaded")
-        return 1
+            missing_files.append(file)
+        except (OSError, UnicodeDecodeError):
+            unreadable_files.append(file)
+        else:
+            file_data = [first_file_data]
+            file_names = [file]
+            remaining_files = files[index + 1:]
+            break
     else:
-        curses.wrapper(curses_main, file_data, file_names, args.linenumbers)
-        return 0
+        if not sources:
+            print("No files loaded")
+            return 1
+
+    found_files = []
+    validator = None
+    if remaining_files:
+        validator = start_validate_files(remaining_files,
+                                         found_files,
+                                         missing_files)
+    file_entries = None
+    scanner = None
+    if sources:
+        os.environ.setdefault("ESCDELAY", "25")  # escape closes the list
+        file_entries = []
+        scanner = start_scan_files(sources, args.recursive, file_entries,
+                                   missing_files)
+    curses.wrapper(curses_main, file_data, file_names, args.linenumbers,
+                   validator, found_files, missing_files,
+                   scanner, file_entries, unreadable_files)
+    return 0
 
 
 if __name__ == "__main__":
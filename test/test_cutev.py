@@ -1,4 +1,9 @@
 
+import os
+import random
+import time
+from array import array
+
 import pytest
 from hecate import Runner
 
@@ -61,6 +66,52 @@ def test_setup_header_multiple_files():
     assert result == expected_result
 
 
+def test_setup_header_missing_files():
+    pad_r = " " * 20
+    pad_l = " " * 20
+    expected_result = pad_r + "foo.py  1 / 2  (not found: bar.py)" + pad_l
+    result = cutev.setup_header("foo.py", 0, 2, 74, ["bar.py"])
+    assert result == expected_result
+
+
+def test_setup_header_missing_files_truncated():
+    result = cutev.setup_header("foo.py", 0, 1, 20, ["bar.py", "baz.py"])
+    assert result == "foo.py  (not found: "
+
+
+def test_setup_header_unreadable_files():
+    result = cutev.setup_header("foo.py", 0, 1, 40, None, ["a.bin"])
+    assert result.strip() == "foo.py  (can not read: a.bin)"
+
+
+def test_get_file_data_binary_file(tmpdir):
+    tf = tmpdir.join("a.bin")
+    tf.write_binary(b"\xff\xfe\x00\x80")
+    unreadable = []
+    result = cutev.get_file_data([None], [tf.strpath], 0, unreadable)
+    assert result == ""
+    assert unreadable == [tf.strpath]
+
+
+def test_get_file_data_not_found(tmpdir):
+    tf = tmpdir.join("foo.py")
+    unreadable = []
+    result = cutev.get_file_data([None], [tf.strpath], 0, unreadable)
+    assert result == ""
+    assert unreadable == [tf.strpath]
+
+
+def test_validate_files(tmpdir):
+    tf1 = tmpdir.join("foo.py")
+    tf1.write("# foo.py")
+    tf2 = tmpdir.join("bar.py")
+    found = []
+    missing = []
+    cutev.validate_files([tf1.strpath, tf2.strpath], found, missing)
+    assert found == [tf1.strpath]
+    assert missing == [tf2.strpath]
+
+
 def test_load_file(tmpdir):
     tf = tmpdir.join("foo.py")
     tf.write("# foo.py\n\nprint('hello world')")
@@ -68,6 +119,189 @@ def test_load_file(tmpdir):
     assert result == "# foo.py\n\nprint('hello world')"
 
 
+def test_hash_lines():
+    data = "foo\n\nbar\nfoo"
+    hashes, starts = cutev.hash_lines(data, chunk_size=2)
+    assert list(hashes) == [hash("foo"), hash(""), hash("bar"), hash("foo")]
+    assert list(starts) == [0, 4, 5, 9, 12]
+    assert cutev.get_line(data, starts, 2) == "bar"
+
+
+@pytest.mark.parametrize("a, b, matched", [
+    ("", "", 0),
+    ("a\nb\nc\n", "a\nb\nc\n", 3),
+    ("a\nb\nc\n", "", 0),
+    ("", "a\nb\nc\n", 0),
+    ("a\nb\nc\na\nb\nb\na\n", "c\nb\na\nb\na\nc\n", 4),
+    ("a\nx\nc\nd\ne\n", "a\nc\nd\ny\ne\nf\n", 4),
+])
+def test_diff_hashes_longest_match(a, b, matched):
+    a_hashes, _ = cutev.hash_lines(a)
+    b_hashes, _ = cutev.hash_lines(b)
+    opcodes = cutev.diff_hashes(a_hashes, b_hashes)
+    a_lines = a.splitlines()
+    b_lines = b.splitlines()
+    assert sum(a_hi - a_lo for tag, a_lo, a_hi, _, _ in opcodes
+               if tag == "equal") == matched
+    for tag, a_lo, a_hi, b_lo, b_hi in opcodes:
+        if tag == "equal":
+            assert a_lines[a_lo:a_hi] == b_lines[b_lo:b_hi]
+
+
+def test_diff_hashes_opcodes():
+    a_hashes, _ = cutev.hash_lines("a\nb\nc\nd\n")
+    b_hashes, _ = cutev.hash_lines("a\nx\nc\nd\ne\n")
+    result = cutev.diff_hashes(a_hashes, b_hashes)
+    assert result == [("equal", 0, 1, 0, 1),
+                      ("replace", 1, 2, 1, 2),
+                      ("equal", 2, 4, 2, 4),
+                      ("insert", 4, 4, 4, 5)]
+
+
+def test_diff_hashes_max_work():
+    a_hashes, _ = cutev.hash_lines("a\nb\nc\nd\ne\n")
+    b_hashes, _ = cutev.hash_lines("a\nc\nb\nd\ne\n")
+    result = cutev.diff_hashes(a_hashes, b_hashes, max_work=0)
+    assert result == [("equal", 0, 1, 0, 1),
+                      ("replace", 1, 3, 1, 3),
+                      ("equal", 3, 5, 3, 5)]
+
+
+def test_diff_hashes_different_large_files_return_quickly():
+    a_hashes, _ = cutev.hash_lines("".join(f"a {n}\n"
+                                           for n in range(100_000)))
+    b_hashes, _ = cutev.hash_lines("".join(f"b {n}\n"
+                                           for n in range(100_000)))
+    start = time.monotonic()
+    result = cutev.diff_hashes(a_hashes, b_hashes)
+    assert time.monotonic() - start < 5
+    assert result == [("replace", 0, 100_000, 0, 100_000)]
+
+
+def test_diff_hashes_scattered_edits_keep_equal_lines():
+    random.seed(0)
+    a_hashes = array("q", range(100_000))
+    b_hashes = array("q", a_hashes)
+    for n in random.sample(range(100_000), 2000):
+        b_hashes[n] = -1 - n
+    result = cutev.diff_hashes(a_hashes, b_hashes)
+    assert sum(a_hi - a_lo for tag, a_lo, a_hi, _, _ in result
+               if tag == "equal") >= 95_000
+
+
+def test_compare_row():
+    opcodes = [("equal", 0, 2, 0, 2),
+               ("replace", 2, 3, 2, 5),
+               ("delete", 3, 5, 5, 5)]
+    row_starts = cutev.compare_row_starts(opcodes)
+    assert list(row_starts) == [0, 2, 5, 7]
+    assert cutev.compare_row(opcodes, row_starts, 1) == ("equal", 1, 1)
+    assert cutev.compare_row(opcodes, row_starts, 2) == ("replace", 2, 2)
+    assert cutev.compare_row(opcodes, row_starts, 4) == ("replace", None, 4)
+    assert cutev.compare_row(opcodes, row_starts, 6) == ("delete", 4, None)
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("*.py", True),
+    ("log?.txt", True),
+    ("[ab].txt", True),
+    ("foo.py", False),
+])
+def test_is_pattern(filename, expected):
+    assert cutev.is_pattern(filename) is expected
+
+
+def test_scan_files(tmpdir):
+    tmpdir.join("foo.py").write("# foo.py")
+    tmpdir.join("bar.txt").write("bar")
+    tmpdir.mkdir("sub").join("baz.py").write("# baz.py")
+    entries = []
+    cutev.scan_files([tmpdir.strpath], False, entries)
+    assert sorted(e[1] for e in entries) == ["bar.txt", "foo.py"]
+    assert all(e[0] == tmpdir.join(e[1]).strpath for e in entries)
+    assert all(e[2] > 0 and e[3] > 0 for e in entries)
+
+
+def test_scan_files_recursive(tmpdir):
+    tmpdir.join("foo.py").write("# foo.py")
+    tmpdir.mkdir("sub").join("baz.py").write("# baz.py")
+    entries = []
+    cutev.scan_files([tmpdir.strpath], True, entries)
+    assert sorted(e[1] for e in entries) == ["foo.py", "sub/baz.py"]
+
+
+def test_scan_files_pattern(tmpdir):
+    tmpdir.join("foo.py").write("# foo.py")
+    tmpdir.join("bar.txt").write("bar")
+    entries = []
+    cutev.scan_files([tmpdir.join("*.py").strpath], False, entries)
+    assert [e[:2] for e in entries] == [(tmpdir.join("foo.py").strpath,
+                                         "foo.py")]
+
+
+def test_scan_files_pattern_directory(tmpdir):
+    tmpdir.mkdir("sub").join("foo.py").write("# foo.py")
+    entries = []
+    cutev.scan_files([tmpdir.join("s*").strpath], False, entries)
+    assert [e[1] for e in entries] == ["sub/foo.py"]
+
+
+@pytest.mark.parametrize("pattern", ["**", "**/*", "*"])
+def test_scan_files_recursive_pattern(tmpdir, pattern):
+    tmpdir.join("a.py").write("# a.py")
+    tmpdir.mkdir("sub").join("b.py").write("# b.py")
+    entries = []
+    cutev.scan_files([tmpdir.strpath + "/" + pattern], True, entries)
+    assert sorted(e[1] for e in entries) == ["a.py", "sub/b.py"]
+
+
+def test_scan_files_directory_trailing_slash(tmpdir):
+    tmpdir.mkdir("sub").join("b.py").write("# b.py")
+    entries = []
+    cutev.scan_files([tmpdir.strpath + "/"], True, entries)
+    assert [e[1] for e in entries] == ["sub/b.py"]
+
+
+def test_scan_files_pattern_no_match(tmpdir):
+    tmpdir.join("foo.py").write("# foo.py")
+    source = tmpdir.join("report[1].txt").strpath
+    entries = []
+    missing = []
+    cutev.scan_files([tmpdir.join("*.py").strpath, source], False,
+                     entries, missing)
+    assert [e[1] for e in entries] == ["foo.py"]
+    assert missing == [source]
+
+
+def test_pattern_root():
+    assert cutev.pattern_root("logs/2020/*.log") == "logs/2020"
+    assert cutev.pattern_root("logs/*/app.log") == "logs"
+    assert cutev.pattern_root("*.log") == ""
+
+
+def test_filter_entries():
+    entries = [("/src/cutev.py", "src/cutev.py", 1, 0.0),
+               ("/README.md", "README.md", 1, 0.0),
+               ("/test/test_cutev.py", "test/test_cutev.py", 1, 0.0)]
+    pattern = cutev.fuzzy_pattern("tcv")
+    result = cutev.filter_entries(entries, range(len(entries)), pattern)
+    assert list(result) == [2]
+    pattern = cutev.fuzzy_pattern("CUTEV")
+    result = cutev.filter_entries(entries, range(len(entries)), pattern)
+    assert list(result) == [0, 2]
+
+
+def test_setup_file_entry():
+    result = cutev.setup_file_entry(("/tmp/foo.py", "foo.py", 120, 0.0), 40)
+    assert len(result) == 40
+    assert result.startswith("         120  ")
+    assert result.rstrip().endswith("  foo.py")
+    result = cutev.setup_file_entry(("/" + "a" * 80, "a" * 80, 120, 0.0),
+                                    40)
+    assert len(result) == 40
+    assert result.endswith("a$")
+
+
 @pytest.mark.parametrize("cmd", ["-h", "--help"])
 def test_cutev_show_help(cmd):
     with Runner(*run_cutev(cmd)) as h:
@@ -316,6 +550,200 @@ def test_cutev_multiple_files_open_one_not_found(tmpdir):
         h.await_text("foo.py  1 / 2")
 
 
+def test_cutev_multiple_files_header_not_found(tmpdir):
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.join("a").write("test test test")
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", "bar.py", "a") as h:
+            h.await_text("foo.py  1 / 2  (not found: bar.py)")
+
+
+def test_cutev_first_file_not_found(tmpdir):
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    tmpdir.join("bar.py").write(sample_file_small())
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", "bar.py") as h:
+            h.await_text("bar.py  (not found: foo.py)")
+            h.await_text("# sample python 3 file")
+
+
+def test_cutev_first_screen_does_not_read_other_files(tmpdir):
+    # opening a fifo with no writer blocks, so the first screen only
+    # shows up if cutev leaves the second file alone
+    tf1 = tmpdir.join("foo.py")
+    tf1.write(sample_file_small())
+    os.mkfifo(tmpdir.join("bar.py").strpath)
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", "bar.py") as h:
+            h.await_text("# sample python 3 file")
+            h.write("q")
+            h.await_exit()
+
+
+def test_cutev_many_files_added_after_first_screen(tmpdir):
+    tf1 = tmpdir.join("foo.py")
+    tf1.write(sample_file_small())
+    others = [tmpdir.join(f"{n}.py") for n in range(200)]
+    for tf in others:
+        tf.write(sample_file_medium())
+    with Runner(*run_cutev(tf1.strpath, *[tf.strpath for tf in others])) as h:
+        h.await_text("foo.py  1 / 201")
+        h.write("q")
+        h.await_exit()
+
+
+def test_cutev_compare_files(tmpdir):
+    tf1 = tmpdir.join("foo.py")
+    tf1.write(sample_file_small())
+    tf2 = tmpdir.join("bar.py")
+    tf2.write(sample_file_small().replace("hello world", "hello there"))
+    with Runner(*run_cutev(tf1.strpath, tf2.strpath)) as h:
+        h.await_text("foo.py  1 / 2")
+        h.write("c")
+        h.await_text("foo.py  |")
+        h.await_text("print('hello world')")
+        h.await_text("print('hello there')")
+        h.write("q")
+        h.await_text("foo.py  1 / 2")
+
+
+def test_cutev_compare_files_scroll_together(tmpdir):
+    data = "".join(f"line {x:03}\n" for x in range(1, 41))
+    tf1 = tmpdir.join("foo.py")
+    tf1.write(data)
+    tf2 = tmpdir.join("bar.py")
+    tf2.write("# new first line\n" + data)
+    with Runner(*run_cutev(tf1.strpath, tf2.strpath)) as h:
+        h.await_text("foo.py  1 / 2")
+        h.write("c")
+        h.await_text("# new first line")
+        assert "line 040" not in h.screenshot()
+        h.press("PageDown")
+        h.await_text("line 040")
+        captured = h.screenshot()
+        assert "# new first line" not in captured
+        assert captured.count("line 040") == 2
+
+
+def test_cutev_compare_single_file(tmpdir):
+    tf = tmpdir.join("foo.py")
+    tf.write(sample_file_small())
+    with Runner(*run_cutev(tf.strpath)) as h:
+        h.await_text("foo.py")
+        h.write("c")
+        h.write("q")
+        h.await_exit()
+
+
+def test_cutev_directory_file_list(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.join("bar.py").write(sample_file_medium())
+    with Runner(*run_cutev(tmpdir.strpath)) as h:
+        h.await_text("2 / 2 files")
+        h.await_text("foo.py")
+        h.await_text("bar.py")
+        h.await_text("Filter:")
+
+
+def test_cutev_directory_file_list_filter_and_open(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.join("bar.py").write(sample_file_medium())
+    with Runner(*run_cutev(tmpdir.strpath)) as h:
+        h.await_text("2 / 2 files")
+        h.write("br")
+        h.await_text("1 / 2 files")
+        h.press("Enter")
+        h.await_text("# sample python 3 medium file")
+        h.write("q")
+        h.await_exit()
+
+
+def test_cutev_directory_file_list_backspace(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.join("bar.py").write(sample_file_medium())
+    with Runner(*run_cutev(tmpdir.strpath)) as h:
+        h.await_text("2 / 2 files")
+        h.write("fo")
+        h.await_text("1 / 2 files")
+        h.press("BSpace")
+        h.press("BSpace")
+        h.await_text("2 / 2 files")
+
+
+def test_cutev_directory_file_list_escape(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    with Runner(*run_cutev(tmpdir.strpath)) as h:
+        h.await_text("1 / 1 files")
+        h.press("Escape")
+        h.await_exit()
+
+
+def test_cutev_directory_file_list_open_binary_file(tmpdir):
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    tmpdir.mkdir("d").join("a.bin").write_binary(b"\xff\xfe\x00\x80")
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "d") as h:
+            h.await_text("1 / 1 files")
+            h.press("Enter")
+            h.await_text("d/a.bin  (can not read: d/a.bin)")
+            h.write("q")
+            h.await_exit()
+
+
+def test_cutev_binary_file_passed(tmpdir):
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    tmpdir.join("a.bin").write_binary(b"\xff\xfe\x00\x80")
+    tmpdir.join("foo.py").write(sample_file_small())
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "a.bin", "foo.py") as h:
+            h.await_text("foo.py  (can not read: a.bin)")
+            h.await_text("# sample python 3 file")
+
+
+def test_cutev_missing_file_with_pattern_characters(tmpdir):
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    tmpdir.join("foo.py").write(sample_file_small())
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", "report[1].txt") as h:
+            h.await_text("# sample python 3 file")
+            h.write("o")
+            h.await_text("0 / 0 files  (not found: report[1].txt)")
+            h.press("Escape")
+            h.await_text("foo.py  (not found: report[1].txt)")
+
+
+def test_cutev_directory_recursive(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.mkdir("sub").join("bar.py").write(sample_file_medium())
+    with Runner(*run_cutev("-r", tmpdir.strpath)) as h:
+        h.await_text("2 / 2 files")
+        h.await_text("bar.py")
+
+
+def test_cutev_pattern_file_list(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    tmpdir.join("bar.txt").write(sample_file_medium())
+    with Runner(*run_cutev(tmpdir.join("*.py").strpath)) as h:
+        h.await_text("1 / 1 files")
+        h.await_text("foo.py")
+
+
+def test_cutev_file_and_directory_open_file_list(tmpdir):
+    tf = tmpdir.join("foo.py")
+    tf.write(sample_file_small())
+    sub = tmpdir.mkdir("sub")
+    sub.join("bar.py").write(sample_file_medium())
+    with Runner(*run_cutev(tf.strpath, sub.strpath)) as h:
+        h.await_text("# sample python 3 file")
+        h.write("o")
+        h.await_text("1 / 1 files")
+        h.press("Enter")
+        h.await_text("bar.py  2 / 2")
+        h.await_text("# sample python 3 medium file")
+
+
 def test_cutev_multiple_files_switching_forward(tmpdir):
     tf1 = tmpdir.join("foo.py")
     tf1.write(sample_file_small())
@@ -402,6 +830,39 @@ def test_cutev_ctrl_a_close_all_except_current(tmpdir):
         h.await_text("# sample python 3 file")
 
 
+def test_cutev_ctrl_x_close_first_file_while_files_are_checked(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    others = [f"{n}" for n in range(3000)]
+    for name in others:
+        tmpdir.join(name).write(sample_file_medium())
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", *others) as h:
+            h.await_text("# sample python 3 file")
+            h.press("^x")
+            h.await_text("0  1 / 3000")
+            h.write("q")
+            h.await_exit()
+
+
+def test_cutev_ctrl_a_drops_files_still_being_checked(tmpdir):
+    tmpdir.join("foo.py").write(sample_file_small())
+    others = [f"{n}" for n in range(3000)]
+    for name in others:
+        tmpdir.join(name).write(sample_file_medium())
+    cutev_path = os.path.abspath("cutev/cutev.py")
+    with tmpdir.as_cwd():
+        with Runner("python3", cutev_path, "foo.py", *others) as h:
+            h.await_text("# sample python 3 file")
+            h.press("^a")
+            time.sleep(0.5)  # long enough for the files to be checked
+            h.press("^n")
+            h.await_text("# sample python 3 file")
+            assert " / " not in h.screenshot().splitlines()[0]
+            h.write("q")
+            h.await_exit()
+
+
 def test_cutev_ctrl_a_close_all_except_current_only_one_open(tmpdir):
     tf1 = tmpdir.join("foo.py")
     tf1.write(sample_file_small())
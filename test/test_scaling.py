@@ -0,0 +1,234 @@
+import os
+import re
+import time
+
+import pytest
+from hecate import Runner
+
+# The scaling tests write hundreds of MB of files, so they only run when
+# CUTEV_SCALING is set. CUTEV_SCALING_SIZES picks the file sizes, for
+# example CUTEV_SCALING_SIZES=64K,1G,4G
+pytestmark = pytest.mark.skipif(not os.environ.get("CUTEV_SCALING"),
+                                reason="set CUTEV_SCALING=1 to run")
+
+DEFAULT_SIZES = "64K,1M,16M,64M"
+PICKER_FILES = [1_000, 100_000]
+
+# The largest size may be at most GROWTH_FACTOR times slower or bigger
+# than the smallest. Timings below TIME_FLOOR_SECONDS count as that much
+# so polling noise on tiny files does not fail the build.
+GROWTH_FACTOR = 2
+TIME_FLOOR_SECONDS = 0.2
+
+# cutev still reads the whole file before the first screen and keeps it in
+# memory, so those grow with the file. Each byte more than the smallest
+# size may add at most this much, which fails on an extra copy of the file.
+FIRST_SCREEN_SECONDS_PER_BYTE = 0.02 / 1024 ** 2
+RSS_BYTES_PER_BYTE = {"short_lines": 3.5, "long_lines": 2.5,
+                      "giant_line": 2.5}
+
+# Runs cutev and prints its peak RSS once it exits.
+RSS_WRAPPER = """\
+import resource, subprocess, sys
+subprocess.call([sys.executable] + sys.argv[1:])
+rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print(f"peak rss {rss} kB")
+input()
+"""
+
+SIZE_UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(size: str) -> int:
+    size = size.strip().upper()
+    if size[-1] in SIZE_UNITS:
+        return int(size[:-1]) * SIZE_UNITS[size[-1]]
+    return int(size)
+
+
+def scaling_sizes():
+    sizes = os.environ.get("CUTEV_SCALING_SIZES", DEFAULT_SIZES)
+    return sorted(parse_size(s) for s in sizes.split(",") if s.strip())
+
+
+def write_numbered_lines(path, size: int, line_length: int) -> int:
+    # every line starts with its 1 based line number padded to 9 digits
+    # so the screen shows which line is at the top. Returns line count.
+    filler = "x" * (line_length - 11)
+    lines_per_chunk = max(1, (1024 ** 2) // line_length)
+    total_lines = max(1, size // line_length)
+    with open(path, "w") as f:
+        for start in range(1, total_lines + 1, lines_per_chunk):
+            end = min(start + lines_per_chunk, total_lines + 1)
+            f.write("".join(f"{n:09d} {filler}\n"
+                            for n in range(start, end)))
+    return total_lines
+
+
+def write_giant_line(path, size: int) -> int:
+    chunk = "0123456789" * (1024 ** 2 // 10)
+    with open(path, "w") as f:
+        for _ in range(size // len(chunk)):
+            f.write(chunk)
+        f.write(chunk[:size % len(chunk)])
+    return 1
+
+
+WRITERS = {
+    "short_lines": lambda path, size: write_numbered_lines(path, size, 80),
+    "long_lines": lambda path, size: write_numbered_lines(path, size,
+                                                          16 * 1024),
+    "giant_line": write_giant_line,
+}
+
+
+def run_cutev_rss(*args):
+    return ["python3", "-c", RSS_WRAPPER, "cutev/cutev.py"] + list(args)
+
+
+def first_line(h) -> str:
+    lines = h.screenshot().splitlines()
+    return lines[1] if len(lines) > 1 else ""
+
+
+def await_first_line(h, start: str, timeout: float = 60) -> float:
+    # waits for the top line of the file view to start with start and
+    # returns how long it took
+    begin = time.monotonic()
+    for _ in h.poll_until_timeout(timeout):
+        if first_line(h).startswith(start):
+            return time.monotonic() - begin
+    raise AssertionError(f"first line never started with {start!r}: "
+                         f"{first_line(h)!r}")
+
+
+def quit_and_get_rss(h) -> int:
+    h.write("q")
+    h.await_text("peak rss", timeout=10)
+    rss = re.search(r"peak rss (\d+) kB", h.screenshot().replace("\n", ""))
+    h.press("Enter")
+    return int(rss.group(1))
+
+
+def measure_file(path: str, total_lines: int) -> dict:
+    # times are measured from the Runner being ready so tmux startup is
+    # not counted
+    results = {}
+    with Runner(*run_cutev_rss(path)) as h:
+        first = "0123456789" if total_lines == 1 else "000000001"
+        results["first_screen"] = await_first_line(h, first)
+
+        if total_lines == 1:
+            h.press("Right")
+            results["scroll"] = await_first_line(h, "1234567890")
+
+        if total_lines > 21:
+            h.press("PageDown")
+            results["page_down"] = await_first_line(h, "000000021")
+            h.press("PageUp")
+            await_first_line(h, "000000001")
+
+        # goto only moves when the line is not already on screen
+        target = total_lines // 2
+        if target > 24:
+            h.write("g")
+            h.await_text("Go to line:")
+            h.write(str(target))
+            h.press("Enter")
+            results["goto"] = await_first_line(h, f"{target:09d}")
+
+        results["rss"] = quit_and_get_rss(h)
+    return results
+
+
+@pytest.fixture(scope="module", params=sorted(WRITERS))
+def measurements(request, tmpdir_factory):
+    # one set of results per size, smallest first
+    results = []
+    for size in scaling_sizes():
+        path = tmpdir_factory.mktemp("scaling").join(f"{size}.txt")
+        total_lines = WRITERS[request.param](path.strpath, size)
+        results.append(measure_file(path.strpath, total_lines))
+        results[-1]["size"] = size
+        results[-1]["shape"] = request.param
+        path.remove()
+    return results
+
+
+def assert_no_growth(measurements, metric: str, floor: float = 0) -> None:
+    values = [m[metric] for m in measurements if metric in m]
+    if len(values) < 2:
+        pytest.skip(f"{metric} is not measured for two sizes")
+    assert values[-1] <= GROWTH_FACTOR * max(values[0], floor)
+
+
+def assert_growth_per_byte(measurements, metric: str, per_byte: float,
+                           floor: float = 0) -> None:
+    values = [(m["size"], m[metric]) for m in measurements if metric in m]
+    if len(values) < 2:
+        pytest.skip(f"{metric} is not measured for two sizes")
+    (first_size, first), (last_size, last) = values[0], values[-1]
+    assert last <= max(first, floor) + per_byte * (last_size - first_size)
+
+
+def test_first_screen_time_grows_at_most_per_byte(measurements):
+    assert_growth_per_byte(measurements, "first_screen",
+                           FIRST_SCREEN_SECONDS_PER_BYTE, TIME_FLOOR_SECONDS)
+
+
+def test_page_down_time_does_not_grow(measurements):
+    assert_no_growth(measurements, "page_down", TIME_FLOOR_SECONDS)
+
+
+def test_goto_time_does_not_grow(measurements):
+    assert_no_growth(measurements, "goto", TIME_FLOOR_SECONDS)
+
+
+def test_scroll_time_does_not_grow(measurements):
+    assert_no_growth(measurements, "scroll", TIME_FLOOR_SECONDS)
+
+
+def test_peak_rss_grows_at_most_per_byte(measurements):
+    # rss is in kB
+    per_byte = RSS_BYTES_PER_BYTE[measurements[0]["shape"]] / 1024
+    assert_growth_per_byte(measurements, "rss", per_byte)
+
+
+def measure_file_list(directory: str, total_files: int) -> dict:
+    results = {}
+    with Runner(*run_cutev_rss(directory)) as h:
+        start = time.monotonic()
+        h.await_text("Filter:", timeout=60)
+        results["first_screen"] = time.monotonic() - start
+        h.await_text(f"{total_files} / {total_files} files", timeout=60)
+
+        start = time.monotonic()
+        for query in ["9", "98", "987"]:
+            h.write(query[-1])
+            h.await_text(f"Filter: {query}", timeout=60)
+        results["filter"] = time.monotonic() - start
+
+        start = time.monotonic()
+        h.press("Enter")
+        for _ in h.poll_until_timeout(60):
+            if "Filter:" not in h.screenshot():
+                break
+        results["open"] = time.monotonic() - start
+    return results
+
+
+@pytest.fixture(scope="module")
+def file_list_measurements(tmpdir_factory):
+    results = []
+    for total_files in PICKER_FILES:
+        directory = tmpdir_factory.mktemp("many_files").strpath
+        for n in range(total_files):
+            path = os.path.join(directory, f"file_{n:06d}.log")
+            open(path, "w").close()
+        results.append(measure_file_list(directory, total_files))
+    return results
+
+
+@pytest.mark.parametrize("metric", ["first_screen", "filter", "open"])
+def test_file_list_time_does_not_grow(file_list_measurements, metric):
+    assert_no_growth(file_list_measurements, metric, TIME_FLOOR_SECONDS)